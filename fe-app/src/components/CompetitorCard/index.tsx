@@ -70,7 +70,12 @@ const CompetitorCard = ({ competitor, mainCompany }: CompetitorCardProps) => {
     setLoading(true);
     try {
       console.log(`Fetching ${deviceStrategy} metrics for ${competitor.name}`);
-      const metrics = await fetchPageSpeedMetrics(competitor.website, deviceStrategy);
+      // Queue the run under the report's company (the card itself when it is the report)
+      const metrics = await fetchPageSpeedMetrics(
+        competitor.website,
+        deviceStrategy,
+        mainCompany?.name ?? competitor.name
+      );
 
       const updatedMetrics = {
         ...performanceMetrics,
@@ -126,7 +126,7 @@ const CompetitorComparison = ({ company }: CompetitorComparisonProps) => {
       }
 
       try {
-        const metrics = await fetchPageSpeedMetrics(company.website, "desktop");
+        const metrics = await fetchPageSpeedMetrics(company.website, "desktop", company.name);
         if (metrics?.speedIndex) {
           console.log("Metrics", metrics.speedIndex);
           setCompanyMetrics((prev) => ({
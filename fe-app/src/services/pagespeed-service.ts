@@ -20,11 +20,14 @@ interface PageSpeedMetrics {
 }
 
 /**
- * Fetch PageSpeed metrics from the backend API with local caching
+ * Fetch PageSpeed metrics from the backend API with local caching.
+ * `companyName` is the company the report is for, the backend queues
+ * PageSpeed runs per company so one large report cannot starve others.
  */
 export async function fetchPageSpeedMetrics(
   url: string,
-  strategy: "mobile" | "desktop" = "desktop"
+  strategy: "mobile" | "desktop" = "desktop",
+  companyName?: string
 ): Promise<PageSpeedMetrics | null> {
   const cacheKey = `${url}-${strategy}`;
 
@@ -42,8 +45,13 @@ export async function fetchPageSpeedMetrics(
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), TIMEOUT_DURATION);
 
+    const params = new URLSearchParams({ url, strategy });
+    if (companyName) {
+      params.set("companyName", companyName);
+    }
+
     const response = await fetch(
-      `${API_BASE_URL}/pagespeed?url=${encodeURIComponent(url)}&strategy=${strategy}`,
+      `${API_BASE_URL}/pagespeed?${params.toString()}`,
       {
         signal: controller.signal,
       }
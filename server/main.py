@@ -1,40 +1,101 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from utils.startup import track_phase, startup_timings
+
+with track_phase("import.fastapi"):
+    from fastapi import FastAPI, HTTPException
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.staticfiles import StaticFiles
+    from utils.compression import CompressionMiddleware
+    from utils.profiler import ProfilerMiddleware, profiler
+
 import os
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
-# Load environment variables
-load_dotenv()
+# Import routers (service modules and their SDKs are imported lazily by the routes)
+with track_phase("import.routes"):
+    from routes.analysis import router as analysis_router
+    from routes.search import router as search_router
+    from routes.admin import router as admin_router
+
+def load_config() -> None:
+    """Load .env before serving so services and middleware see their settings"""
+    with track_phase("startup.dotenv"):
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    profiler.configure()
+
+async def warm_up(app: FastAPI) -> None:
+    """Pre-create pooled clients in the background, /api/ready returns 503 until done"""
+    try:
+        # Imports and client construction (SSL contexts, the OpenAI SDK) are blocking,
+        # run them in a worker thread so the loop keeps serving while we warm up
+        with track_phase("warmup.http"):
+            await asyncio.to_thread(lambda: importlib.import_module("services.http").get_http_client())
 
-# Import routers
-from routes.analysis import router as analysis_router
-from routes.search import router as search_router
+        if os.getenv("OPENAI_API_KEY"):
+            with track_phase("warmup.openai"):
+                await asyncio.to_thread(lambda: importlib.import_module("services.openai").get_client())
+    except Exception as e:
+        # Clients are also created lazily, so a failed warm-up only costs the first request
+        print(f"[{datetime.now()}] ⚠️  Warm-up failed: {str(e)}")
+
+    app.state.ready = True
+    print(f"[{datetime.now()}] ✅ Server ready (startup phases: {startup_timings})")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_config()
+    warm_up_task = asyncio.create_task(warm_up(app))
+    yield
+    warm_up_task.cancel()
+    app.state.ready = False
+    from services.http import close_http_client
+    await close_http_client()
 
 # Create FastAPI app
-app = FastAPI(title="Compete Insight Hub API")
+with track_phase("app"):
+    app = FastAPI(title="Compete Insight Hub API", lifespan=lifespan)
+    app.state.ready = False
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, replace with specific origins
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Compress responses larger than COMPRESSION_MIN_SIZE bytes (screenshots are already JPEGs)
+    app.add_middleware(CompressionMiddleware, excluded_prefixes=["/api/screenshots"])
+
+    # Opt-in request profiling, see PROFILING_ENABLED and PROFILE_SAMPLE_RATE
+    app.add_middleware(ProfilerMiddleware)
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Mount the screenshots directory from the analysis-server
+    screenshots_path = Path("../analysis-server/screenshots")
+    app.mount("/api/screenshots", StaticFiles(directory=str(screenshots_path)), name="screenshots")
 
-# Mount the screenshots directory from the analysis-server
-screenshots_path = Path("../analysis-server/screenshots")
-app.mount("/api/screenshots", StaticFiles(directory=str(screenshots_path)), name="screenshots")
+    # Include routers
+    app.include_router(analysis_router, prefix="/api")
+    app.include_router(search_router, prefix="/api")
+    app.include_router(admin_router, prefix="/api")
 
-# Include routers
-app.include_router(analysis_router, prefix="/api")
-app.include_router(search_router, prefix="/api")
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe, succeeds once the background warm-up has completed"""
+    if not app.state.ready:
+        raise HTTPException(status_code=503, detail="Server is warming up")
+    return {"ready": True, "startup": startup_timings}
 
 if __name__ == "__main__":
     import uvicorn
+    from dotenv import load_dotenv
+    load_dotenv()
     port = int(os.getenv("PORT", "3001"))
     print(f"[{datetime.now()}] 🚀 Starting server on port {port}")
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True) 
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
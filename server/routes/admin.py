@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from collections import Counter
+from utils.auth import admin_configured, is_admin_token
+from utils.profiler import profiler
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Only allow requests carrying the configured ADMIN_TOKEN"""
+    if not admin_configured():
+        raise HTTPException(status_code=403, detail="Admin access is not configured")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+async def list_profiles():
+    """List the most recent request profiles, newest first"""
+    return {
+        "enabled": profiler.enabled,
+        "sampleRate": profiler.sample_rate,
+        "profiles": [p.summary() for p in reversed(profiler.profiles)]
+    }
+
+@router.get("/profiles/flamegraph", response_class=PlainTextResponse)
+async def get_combined_flamegraph():
+    """Merge the samples of all stored profiles into one collapsed-stack flamegraph"""
+    merged: Counter = Counter()
+    for profile in list(profiler.profiles):
+        for line in profile.collapsed().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            merged[stack] += int(count)
+    return "\n".join(f"{stack} {count}" for stack, count in merged.items())
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Get the timing breakdown of a single request profile"""
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.summary()
+
+@router.get("/profiles/{profile_id}/flamegraph", response_class=PlainTextResponse)
+async def get_profile_flamegraph(profile_id: str):
+    """Get a request profile's samples in collapsed-stack (flamegraph) format"""
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.collapsed()
@@ -3,6 +3,8 @@ from models.schemas import PageAnalysisRequest, PageAnalysisResponse
 from datetime import datetime
 import httpx
 import os
+from services.http import get_http_client
+from utils.profiler import track_upstream
 
 router = APIRouter()
 
@@ -16,26 +18,28 @@ async def analyze_pages(request: PageAnalysisRequest):
         print(f"[{datetime.now()}] 📋 Request details: {request.dict()}")
 
         # Forward request to Node.js server
-        async with httpx.AsyncClient(timeout=600.0) as client:  # 10 minutes timeout
+        client = get_http_client()
+        with track_upstream("analysis-server"):
             response = await client.post(
                 f"{NODEJS_ANALYSIS_SERVER}/api/analyze-pages",
                 json={
                     "url": request.url,
                     "page_group": request.page_group,
                     "company_name": request.company_name
-                }
+                },
+                timeout=600.0  # 10 minutes timeout
             )
 
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"[{datetime.now()}] ❌ Node.js server error: {error_text}")
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=error_text
-                )
-            
-            print(f"[{datetime.now()}] 📦 Node.js server response: {response.json()}")
-            return response.json()
+        if response.status_code != 200:
+            error_text = response.text
+            print(f"[{datetime.now()}] ❌ Node.js server error: {error_text}")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=error_text
+            )
+        
+        print(f"[{datetime.now()}] 📦 Node.js server response: {response.json()}")
+        return response.json()
 
     except httpx.RequestError as e:
         print(f"[{datetime.now()}] 🔥 Error connecting to Node.js server: {str(e)}")
@@ -1,10 +1,8 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Dict, Optional
 from models.schemas import Technology, PageSpeedMetrics, CompetitorAnalysis
-from services.wappalyzer import analyze_technologies
-from services.similarweb import get_website_traffic
-from services.pagespeed import fetch_pagespeed_metrics
-from services.openai import get_competitor_insights, get_single_competitor_insight
+from utils.serialization import negotiate_response
+from utils.profiler import track_span
 from pathlib import Path
 import os
 
@@ -26,9 +24,10 @@ async def check_screenshots(url: str = Query(...), page_group: str = Query(...))
             return {"exists": False, "path": None}
             
         # Look for files matching the pattern
-        files = [f for f in os.listdir(domain_path) 
-                if f.startswith(f"{page_group}_") and f.endswith(".jpg") and not f.endswith("_part1.jpg") 
-                and not f.endswith("_part2.jpg") and not f.endswith("_part3.jpg")]
+        with track_span("screenshots.scan"):
+            files = [f for f in os.listdir(domain_path) 
+                    if f.startswith(f"{page_group}_") and f.endswith(".jpg") and not f.endswith("_part1.jpg") 
+                    and not f.endswith("_part2.jpg") and not f.endswith("_part3.jpg")]
         
         if not files:
             return {"exists": False, "path": None}
@@ -56,6 +55,7 @@ async def analyze_website_technologies(url: str = Query(..., description="Websit
         }
 
     try:
+        from services.wappalyzer import analyze_technologies
         result = await analyze_technologies(url)
         return result
     except Exception as e:
@@ -66,14 +66,18 @@ async def analyze_website_technologies(url: str = Query(..., description="Websit
         }
 
 @router.get("/company-insights")
-async def get_company_insights(companyName: str = Query(..., description="Company name to analyze")):
+async def get_company_insights(
+    request: Request,
+    companyName: str = Query(..., description="Company name to analyze")
+):
     """Get company insights and analysis"""
     if not companyName:
         raise HTTPException(status_code=400, detail="Company name is required")
 
     try:
+        from services.openai import get_competitor_insights
         insights = await get_competitor_insights(companyName)
-        return insights
+        return negotiate_response(request, insights, CompetitorAnalysis)
     except Exception as e:
         print("Error getting company insights:", str(e))
         raise HTTPException(status_code=500, detail="Failed to get company insights")
@@ -85,6 +89,7 @@ async def get_single_company_insight_route(companyName: str = Query(..., descrip
         raise HTTPException(status_code=400, detail="Company name is required")
 
     try:
+        from services.openai import get_single_competitor_insight
         insight = await get_single_competitor_insight(companyName)
         return insight
     except Exception as e:
@@ -98,6 +103,7 @@ async def get_traffic_data(url: str = Query(..., description="Website URL to ana
         raise HTTPException(status_code=400, detail="Website URL is required")
 
     try:
+        from services.similarweb import get_website_traffic
         traffic_data = await get_website_traffic(url)
         return traffic_data
     except Exception as e:
@@ -106,8 +112,10 @@ async def get_traffic_data(url: str = Query(..., description="Website URL to ana
 
 @router.get("/pagespeed")
 async def get_pagespeed_metrics(
+    request: Request,
     url: str = Query(..., description="Website URL to analyze"),
-    strategy: str = Query(..., description="Analysis strategy (mobile/desktop)")
+    strategy: str = Query(..., description="Analysis strategy (mobile/desktop)"),
+    companyName: Optional[str] = Query(None, description="Company the report is for, used for fair scheduling")
 ):
     """Get PageSpeed metrics for a website"""
     if not url:
@@ -117,9 +125,16 @@ async def get_pagespeed_metrics(
         raise HTTPException(status_code=400, detail="Strategy is required")
 
     try:
-        metrics = await fetch_pagespeed_metrics(url, strategy)
-        return metrics
+        from services.pagespeed_scheduler import schedule_pagespeed_metrics
+        # Runs without a company share one queue, keying by domain would give every competitor its own
+        metrics = await schedule_pagespeed_metrics(url, strategy, companyName)
+        return negotiate_response(request, metrics, PageSpeedMetrics)
     except Exception as e:
         print("Error getting PageSpeed metrics:", str(e))
         raise HTTPException(status_code=500, detail="Failed to get PageSpeed metrics")
 
+@router.get("/pagespeed/scheduler")
+async def get_pagespeed_scheduler_stats():
+    """Get the current state of the PageSpeed scheduler"""
+    from services.pagespeed_scheduler import scheduler
+    return scheduler.stats()
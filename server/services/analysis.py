@@ -1,10 +1,7 @@
 from typing import Dict
 from models.schemas import PageAnalysisResponse, PageGroup
 import os
-from playwright.async_api import async_playwright
-import httpx
 from datetime import datetime
-from browserbase import Browserbase
 
 # In-memory store for analysis results
 analysis_store: Dict[str, PageAnalysisResponse] = {}
@@ -38,6 +35,10 @@ async def run_page_analysis(
         # Update status to running
         update_analysis_status(analysis_id, "running")
 
+        # Browser automation SDKs are heavy, only import them when an analysis runs
+        from browserbase import Browserbase
+        from playwright.async_api import async_playwright
+
         # Initialize Browserbase client
         browserbase_api_key = os.getenv("BROWSERBASE_API_KEY")
         browserbase_project_id = os.getenv("BROWSERBASE_PROJECT_ID")
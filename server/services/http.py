@@ -0,0 +1,24 @@
+import httpx
+from typing import Optional
+from datetime import datetime
+
+# Shared connection pool for all upstream API calls
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the pooled HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+        print(f"[{datetime.now()}] 🔌 Created pooled HTTP client")
+    return _client
+
+async def close_http_client() -> None:
+    """Close the pooled HTTP client and release its connections"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
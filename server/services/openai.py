@@ -1,8 +1,16 @@
 import os
 from openai import AsyncOpenAI
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from utils.profiler import track_upstream, track_span
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client: Optional[AsyncOpenAI] = None
+
+def get_client() -> AsyncOpenAI:
+    """Get the shared OpenAI client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
 
 def clean_json_response(json_string: str) -> str:
     """Cleans JSON string that might be wrapped in markdown code blocks"""
@@ -48,16 +56,18 @@ Format your response as a JSON object with the following structure:
 
 If you cannot estimate the revenue for a specific competitor, you may omit the "revenue" field for that competitor."""
 
-        response = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=2500
-        )
+        with track_upstream("openai"):
+            response = await get_client().chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7,
+                max_tokens=2500
+            )
 
-        content = response.choices[0].message.content
-        cleaned_content = clean_json_response(content)
-        return eval(cleaned_content)
+        with track_span("openai.parse"):
+            content = response.choices[0].message.content
+            cleaned_content = clean_json_response(content)
+            return eval(cleaned_content)
 
     except Exception as e:
         raise ValueError(f"OpenAI API error: {str(e)}")
@@ -88,16 +98,18 @@ Format your response as a JSON object with the following structure:
 
 If you cannot estimate the revenue, you may omit the "revenue" field."""
 
-        response = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=1000
-        )
-
-        content = response.choices[0].message.content
-        cleaned_content = clean_json_response(content)
-        return eval(cleaned_content)
+        with track_upstream("openai"):
+            response = await get_client().chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7,
+                max_tokens=1000
+            )
+
+        with track_span("openai.parse"):
+            content = response.choices[0].message.content
+            cleaned_content = clean_json_response(content)
+            return eval(cleaned_content)
 
     except Exception as e:
         raise ValueError(f"OpenAI API error: {str(e)}") 
\ No newline at end of file
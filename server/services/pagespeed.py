@@ -2,8 +2,11 @@ import os
 import httpx
 from typing import Optional
 import json
+from services.http import get_http_client
+from utils.profiler import track_upstream, track_span
 
-PAGESPEED_API_KEY = os.getenv("PAGESPEED_API_KEY")
+class PageSpeedCapacityError(ValueError):
+    """PageSpeed failed because it is overloaded (timeout, 429 or 5xx), not because of the request"""
 
 def get_audit_numeric_value(audits: dict, audit_name: str) -> Optional[float]:
     """Safely extract numeric value from audit"""
@@ -14,7 +17,8 @@ def get_audit_numeric_value(audits: dict, audit_name: str) -> Optional[float]:
 
 async def fetch_pagespeed_metrics(url: str, strategy: str) -> dict:
     """Fetch PageSpeed metrics for a given URL"""
-    if not PAGESPEED_API_KEY:
+    api_key = os.getenv("PAGESPEED_API_KEY")
+    if not api_key:
         raise ValueError("PageSpeed API key not configured")
 
     try:
@@ -27,40 +31,48 @@ async def fetch_pagespeed_metrics(url: str, strategy: str) -> dict:
             f"?url={formatted_url}"
             f"&{categories_param}"
             f"&strategy={strategy}"
-            f"&key={PAGESPEED_API_KEY}"
+            f"&key={api_key}"
         )
 
         # Set timeout to 5 minutes (300 seconds) for PageSpeed API
         timeout = httpx.Timeout(300.0, connect=30.0)
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            try:
-                response = await client.get(api_url)
+        client = get_http_client()
+        try:
+            with track_upstream("pagespeed"):
+                response = await client.get(api_url, timeout=timeout)
 
-                if not response.is_success:
-                    raise ValueError(f"PageSpeed API error: {response.reason_phrase}")
+            if response.status_code == 429 or response.status_code >= 500:
+                raise PageSpeedCapacityError(f"PageSpeed API error: {response.reason_phrase}")
 
+            if not response.is_success:
+                raise ValueError(f"PageSpeed API error: {response.reason_phrase}")
+
+            # Lighthouse results are several MB of JSON
+            with track_span("pagespeed.parse"):
                 data = response.json()
 
-                if "lighthouseResult" not in data:
-                    raise ValueError("No Lighthouse result in API response")
+            if "lighthouseResult" not in data:
+                raise ValueError("No Lighthouse result in API response")
 
-                categories = data["lighthouseResult"]["categories"]
-                audits = data["lighthouseResult"]["audits"]
+            categories = data["lighthouseResult"]["categories"]
+            audits = data["lighthouseResult"]["audits"]
 
-                metrics = {
-                    "performance": round(categories["performance"]["score"] * 100),
-                    "accessibility": round(categories["accessibility"]["score"] * 100),
-                    "bestPractices": round(categories["best-practices"]["score"] * 100),
-                    "seo": round(categories["seo"]["score"] * 100),
-                    "speedIndex": round(audits["speed-index"]["score"] * 100),
-                    "largestContentfulPaint": get_audit_numeric_value(audits, "largest-contentful-paint"),
-                    "cumulativeLayoutShift": get_audit_numeric_value(audits, "cumulative-layout-shift")
-                }
+            metrics = {
+                "performance": round(categories["performance"]["score"] * 100),
+                "accessibility": round(categories["accessibility"]["score"] * 100),
+                "bestPractices": round(categories["best-practices"]["score"] * 100),
+                "seo": round(categories["seo"]["score"] * 100),
+                "speedIndex": round(audits["speed-index"]["score"] * 100),
+                "largestContentfulPaint": get_audit_numeric_value(audits, "largest-contentful-paint"),
+                "cumulativeLayoutShift": get_audit_numeric_value(audits, "cumulative-layout-shift")
+            }
 
-                return metrics
+            return metrics
 
-            except httpx.TimeoutException as timeout_error:
-                raise ValueError("PageSpeed API timeout: The request took too long to complete. This can happen with complex pages or slow connections. Please try again.") from timeout_error
+        except httpx.TimeoutException as timeout_error:
+            raise PageSpeedCapacityError("PageSpeed API timeout: The request took too long to complete. This can happen with complex pages or slow connections. Please try again.") from timeout_error
 
+    except PageSpeedCapacityError as e:
+        raise PageSpeedCapacityError(f"Error getting PageSpeed metrics: {str(e)}") from e
     except Exception as e:
         raise ValueError(f"Error getting PageSpeed metrics: {str(e)}") 
\ No newline at end of file
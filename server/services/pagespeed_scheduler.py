@@ -0,0 +1,194 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from services.pagespeed import PageSpeedCapacityError, fetch_pagespeed_metrics
+from utils.profiler import Timings, current_profile
+
+FetchFn = Callable[[str, str], Awaitable[dict]]
+
+@dataclass
+class PageSpeedJob:
+    key: Tuple[str, str]
+    url: str
+    strategy: str
+    future: asyncio.Future
+    # Upstream and parse timings of the shared run, credited to every profiled waiter
+    timings: Timings = field(default_factory=Timings)
+    fetch_started: Optional[float] = None
+
+class PageSpeedScheduler:
+    """Schedule PageSpeed runs with an AIMD concurrency limit and fair queuing
+
+    The concurrency limit grows by roughly one slot per limit's worth of
+    healthy runs and is halved on congestion. PageSpeed latency mostly depends
+    on the page being tested, so a run only counts as slow when it takes more
+    than `latency_tolerance` times that URL's own latency EWMA. Congestion is
+    either a slow run or a rate of capacity failures (timeouts, 429, 5xx) above
+    `error_rate_threshold`; client errors such as a bad URL are ignored. Each
+    fairness key (company or user) gets its own queue and queues are served
+    round-robin, so one large report cannot starve others.
+    Identical url/strategy runs that are queued or in flight share one result.
+    """
+
+    def __init__(
+        self,
+        fetch: FetchFn = fetch_pagespeed_metrics,
+        initial_limit: float = 4.0,
+        min_limit: float = 1.0,
+        max_limit: float = 16.0,
+        latency_tolerance: float = 2.0,
+        ewma_alpha: float = 0.3,
+        max_tracked_urls: int = 1000,
+        error_rate_threshold: float = 0.2,
+        window_size: int = 20,
+        backoff: float = 0.5,
+        min_backoff_interval: float = 1.0
+    ):
+        self._fetch = fetch
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.ewma_alpha = ewma_alpha
+        self.max_tracked_urls = max_tracked_urls
+        self.error_rate_threshold = error_rate_threshold
+        self.backoff = backoff
+        self.min_backoff_interval = min_backoff_interval
+        # Smoothed duration of any run, only used to space out back-offs
+        self._round_trip = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        # Latency EWMA per url/strategy, least recently run first
+        self._url_latency: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._queues: "OrderedDict[str, Deque[PageSpeedJob]]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], PageSpeedJob] = {}
+        self._tasks: set = set()
+        self._active = 0
+        self._last_decrease = float("-inf")
+
+    async def submit(self, url: str, strategy: str, fair_key: str) -> dict:
+        """Queue a PageSpeed run and wait for its metrics"""
+        formatted_url = url if url.startswith(("http://", "https://")) else f"https://{url}"
+        key = (formatted_url.rstrip("/"), strategy.lower())
+
+        job = self._pending.get(key)
+        if job is None:
+            future = asyncio.get_running_loop().create_future()
+            # Avoid "exception was never retrieved" warnings when every waiter went away
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            job = PageSpeedJob(key=key, url=formatted_url, strategy=strategy, future=future)
+            self._pending[key] = job
+            self._queues.setdefault(fair_key, deque()).append(job)
+            self._dispatch()
+        else:
+            print(f"[{datetime.now()}] 🔁 Joining in-flight PageSpeed run for {key[0]} ({key[1]})")
+
+        waiting_since = time.perf_counter()
+        try:
+            # Shield so a disconnecting client does not cancel a run others are waiting on
+            return await asyncio.shield(job.future)
+        finally:
+            self._credit_waiter(job, waiting_since)
+
+    def stats(self) -> dict:
+        """Current scheduler state"""
+        return {
+            "limit": round(self.limit, 2),
+            "active": self._active,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "queues": {k: len(q) for k, q in self._queues.items()},
+            "errorRate": round(self._error_rate(), 2),
+            "trackedUrls": len(self._url_latency)
+        }
+
+    def _dispatch(self) -> None:
+        while self._active < int(self.limit) and self._queues:
+            # Round-robin: take the head of the first queue, then move that queue to the back
+            fair_key, queue = self._queues.popitem(last=False)
+            job = queue.popleft()
+            if queue:
+                self._queues[fair_key] = queue
+
+            self._active += 1
+            # Run in an empty context so per-request state is not leaked into shared runs
+            task = contextvars.Context().run(asyncio.create_task, self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _credit_waiter(self, job: PageSpeedJob, waiting_since: float) -> None:
+        """Split a profiled waiter's wait into scheduler queueing and the shared run's timings"""
+        profile = current_profile.get()
+        if profile is None:
+            return
+        queued_until = job.fetch_started if job.fetch_started is not None else time.perf_counter()
+        profile.spans["pagespeed.queue"] += max(0.0, queued_until - waiting_since)
+        if job.future.done():
+            profile.merge(job.timings)
+
+    async def _run(self, job: PageSpeedJob) -> None:
+        # The run is detached from any request, record its timings on the job instead
+        current_profile.set(job.timings)
+        job.fetch_started = time.perf_counter()
+        start = time.monotonic()
+        outcome = "ok"
+        try:
+            result = await self._fetch(job.url, job.strategy)
+            job.future.set_result(result)
+        except PageSpeedCapacityError as e:
+            outcome = "congested"
+            job.future.set_exception(e)
+        except Exception as e:
+            # Bad input or a missing API key says nothing about PageSpeed's capacity
+            outcome = "client_error"
+            job.future.set_exception(e)
+        finally:
+            self._active -= 1
+            self._pending.pop(job.key, None)
+            if outcome != "client_error":
+                self._record(job.key, time.monotonic() - start, outcome == "congested")
+            self._dispatch()
+
+    def _error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _is_slow(self, key: Tuple[str, str], latency: float) -> bool:
+        """Compare a run against the same URL's history and update that history"""
+        previous = self._url_latency.pop(key, None)
+        if previous is None:
+            ewma = latency
+        else:
+            ewma = previous + self.ewma_alpha * (latency - previous)
+        self._url_latency[key] = ewma
+        if len(self._url_latency) > self.max_tracked_urls:
+            self._url_latency.popitem(last=False)
+        return previous is not None and latency > previous * self.latency_tolerance
+
+    def _record(self, key: Tuple[str, str], latency: float, failed: bool) -> None:
+        self._outcomes.append(failed)
+        self._round_trip += self.ewma_alpha * (latency - self._round_trip)
+        slow = not failed and self._is_slow(key, latency)
+        overloaded = slow or (failed and self._error_rate() > self.error_rate_threshold)
+
+        if overloaded:
+            # Only back off once per round trip, runs that started together finish together
+            now = time.monotonic()
+            if now - self._last_decrease < max(self.min_backoff_interval, self._round_trip, latency):
+                return
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            print(f"[{datetime.now()}] 📉 PageSpeed concurrency decreased to {self.limit:.2f} "
+                  f"(latency {latency:.1f}s, error rate {self._error_rate():.0%})")
+        elif not failed:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+scheduler = PageSpeedScheduler()
+
+async def schedule_pagespeed_metrics(url: str, strategy: str, fair_key: Optional[str] = None) -> dict:
+    """Fetch PageSpeed metrics through the shared scheduler"""
+    return await scheduler.submit(url, strategy, fair_key or "default")
@@ -2,9 +2,8 @@ import os
 import re
 from urllib.parse import urlparse
 from datetime import datetime, timedelta
-import httpx
-
-SIMILARWEB_API_KEY = os.getenv("SIMILARWEB_API_KEY")
+from services.http import get_http_client
+from utils.profiler import track_upstream
 
 def format_traffic_number(visits: int) -> str:
     """Format traffic number to human readable format"""
@@ -32,7 +31,8 @@ def get_date_range() -> tuple[str, str]:
 
 async def get_website_traffic(website_url: str) -> dict:
     """Get website traffic data from SimilarWeb API"""
-    if not SIMILARWEB_API_KEY:
+    api_key = os.getenv("SIMILARWEB_API_KEY")
+    if not api_key:
         raise ValueError("SimilarWeb API key not configured")
 
     try:
@@ -41,27 +41,28 @@ async def get_website_traffic(website_url: str) -> dict:
         
         start_date, end_date = get_date_range()
         params = {
-            "api_key": SIMILARWEB_API_KEY,
+            "api_key": api_key,
             "granularity": "monthly",
             "start_date": start_date,
             "end_date": end_date
         }
 
-        async with httpx.AsyncClient() as client:
+        client = get_http_client()
+        with track_upstream("similarweb"):
             response = await client.get(api_url, params=params)
 
-            if not response.is_success:
-                raise ValueError(f"SimilarWeb API error: {response.reason_phrase}")
+        if not response.is_success:
+            raise ValueError(f"SimilarWeb API error: {response.reason_phrase}")
 
-            data = response.json()
-            if not data.get("visits"):
-                raise ValueError("No traffic data available for this website")
+        data = response.json()
+        if not data.get("visits"):
+            raise ValueError("No traffic data available for this website")
 
-            monthly_visits = data["visits"][-1]["visits"]  # Get the most recent month's visits
-            return {
-                "visits": format_traffic_number(monthly_visits),
-                "monthlyVisits": monthly_visits
-            }
+        monthly_visits = data["visits"][-1]["visits"]  # Get the most recent month's visits
+        return {
+            "visits": format_traffic_number(monthly_visits),
+            "monthlyVisits": monthly_visits
+        }
 
     except Exception as e:
         raise ValueError(f"Error getting website traffic: {str(e)}") 
\ No newline at end of file
@@ -1,9 +1,8 @@
 import os
-import httpx
 from typing import Dict, List, Set
 from models.schemas import Technology
-
-WAPPALYZER_API_KEY = os.getenv("WAPPALYZER_API_KEY")
+from services.http import get_http_client
+from utils.profiler import track_upstream
 
 # Define relevant categories and category to group mapping
 RELEVANT_CATEGORIES: Set[str] = {
@@ -64,7 +63,8 @@ def get_category_group(category: str) -> str:
 
 async def analyze_technologies(url: str) -> Dict:
     """Analyze website technologies using Wappalyzer API"""
-    if not WAPPALYZER_API_KEY:
+    api_key = os.getenv("WAPPALYZER_API_KEY")
+    if not api_key:
         raise ValueError("Wappalyzer API key not configured")
 
     domain = extract_domain(url)
@@ -74,42 +74,43 @@ async def analyze_technologies(url: str) -> Dict:
     try:
         api_url = f"https://api.wappalyzer.com/v2/lookup/?urls=https://{domain}"
         headers = {
-            "x-api-key": WAPPALYZER_API_KEY,
+            "x-api-key": api_key,
             "Accept": "application/json"
         }
         
-        async with httpx.AsyncClient() as client:
+        client = get_http_client()
+        with track_upstream("wappalyzer"):
             response = await client.get(api_url, headers=headers)
 
-            if response.status_code == 403:
-                raise ValueError("Invalid API key or quota exceeded")
-
-            if response.status_code != 200:
-                error_text = response.text
-                print("Wappalyzer API error response:", error_text)
-                raise ValueError(f"Wappalyzer API error: {response.status_code} {response.reason_phrase}")
-
-            data = response.json()
-
-            # Filter and group technologies
-            technologies = []
-            if data and len(data) > 0 and "technologies" in data[0]:
-                for tech in data[0]["technologies"]:
-                    # Only include tech if at least one of its categories is relevant
-                    relevant_category = None
-                    for cat in tech.get("categories", []):
-                        if cat.get("name") in RELEVANT_CATEGORIES:
-                            relevant_category = cat["name"]
-                            break
-
-                    if relevant_category:
-                        technologies.append({
-                            "name": tech["name"],
-                            "category": relevant_category,
-                            "grouping": get_category_group(relevant_category)
-                        })
-
-            return {"technologies": technologies}
+        if response.status_code == 403:
+            raise ValueError("Invalid API key or quota exceeded")
+
+        if response.status_code != 200:
+            error_text = response.text
+            print("Wappalyzer API error response:", error_text)
+            raise ValueError(f"Wappalyzer API error: {response.status_code} {response.reason_phrase}")
+
+        data = response.json()
+
+        # Filter and group technologies
+        technologies = []
+        if data and len(data) > 0 and "technologies" in data[0]:
+            for tech in data[0]["technologies"]:
+                # Only include tech if at least one of its categories is relevant
+                relevant_category = None
+                for cat in tech.get("categories", []):
+                    if cat.get("name") in RELEVANT_CATEGORIES:
+                        relevant_category = cat["name"]
+                        break
+
+                if relevant_category:
+                    technologies.append({
+                        "name": tech["name"],
+                        "category": relevant_category,
+                        "grouping": get_category_group(relevant_category)
+                    })
+
+        return {"technologies": technologies}
 
     except Exception as e:
         return {
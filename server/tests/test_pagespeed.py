@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import pagespeed
+from services.pagespeed import PageSpeedCapacityError, fetch_pagespeed_metrics
+
+def fetch_with_response(monkeypatch, handler):
+    monkeypatch.setenv("PAGESPEED_API_KEY", "test-key")
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(pagespeed, "get_http_client", lambda: client)
+    return asyncio.run(fetch_pagespeed_metrics("example.com", "mobile"))
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_overload_statuses_raise_capacity_errors(monkeypatch, status_code):
+    with pytest.raises(PageSpeedCapacityError):
+        fetch_with_response(monkeypatch, lambda request: httpx.Response(status_code))
+
+def test_timeouts_raise_capacity_errors(monkeypatch):
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    with pytest.raises(PageSpeedCapacityError):
+        fetch_with_response(monkeypatch, handler)
+
+def test_bad_requests_are_not_capacity_errors(monkeypatch):
+    with pytest.raises(ValueError) as error:
+        fetch_with_response(monkeypatch, lambda request: httpx.Response(400))
+    assert not isinstance(error.value, PageSpeedCapacityError)
+
+def test_missing_api_key_is_not_a_capacity_error(monkeypatch):
+    monkeypatch.delenv("PAGESPEED_API_KEY", raising=False)
+    with pytest.raises(ValueError) as error:
+        asyncio.run(fetch_pagespeed_metrics("example.com", "mobile"))
+    assert not isinstance(error.value, PageSpeedCapacityError)
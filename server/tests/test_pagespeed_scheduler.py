@@ -0,0 +1,181 @@
+import asyncio
+import random
+
+from services import pagespeed_scheduler
+from services.pagespeed import PageSpeedCapacityError
+from services.pagespeed_scheduler import PageSpeedScheduler
+from utils.profiler import Timings, current_profile, track_upstream
+
+def make_fetch(calls, latency=0.0, error=None, gate=None):
+    """Fake PageSpeed fetch recording each call, optionally slow, failing or gated"""
+    async def fetch(url, strategy):
+        calls.append((url, strategy))
+        if gate is not None:
+            await gate.wait()
+        await asyncio.sleep(latency(url) if callable(latency) else latency)
+        if error is not None:
+            raise error
+        return {"url": url, "strategy": strategy}
+    return fetch
+
+def test_limit_grows_on_healthy_runs_even_when_slow():
+    async def run():
+        calls = []
+        scheduler = PageSpeedScheduler(fetch=make_fetch(calls, latency=0.02), initial_limit=2)
+        for i in range(10):
+            await scheduler.submit(f"site{i}.com", "mobile", "acme")
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert scheduler.limit > 2
+
+def test_limit_does_not_shrink_with_mixed_page_latencies(monkeypatch):
+    # Healthy traffic over pages that take 10-60s each, one run finishing every 8s
+    clock = [0.0]
+    monkeypatch.setattr(pagespeed_scheduler.time, "monotonic", lambda: clock[0])
+    rng = random.Random(7)
+    page_latency = {f"https://site{i}.com": rng.uniform(10, 60) for i in range(30)}
+    scheduler = PageSpeedScheduler(initial_limit=4)
+
+    for _ in range(300):
+        url = rng.choice(list(page_latency))
+        clock[0] += 8
+        scheduler._record((url, "mobile"), page_latency[url] * rng.uniform(0.7, 1.3), False)
+
+    assert scheduler.limit >= 4
+
+def test_limit_halves_when_a_url_gets_slower_than_its_history():
+    slowdown = {"factor": 1}
+
+    async def run():
+        calls = []
+        scheduler = PageSpeedScheduler(
+            fetch=make_fetch(calls, latency=lambda url: 0.01 * slowdown["factor"]),
+            initial_limit=8,
+            min_backoff_interval=0
+        )
+        await scheduler.submit("site.com", "mobile", "acme")
+        await scheduler.submit("other.com", "mobile", "acme")
+        limit_before = scheduler.limit
+        slowdown["factor"] = 5
+        await scheduler.submit("site.com", "desktop", "acme")
+        await scheduler.submit("site.com", "mobile", "acme")
+        return limit_before, scheduler.limit
+
+    limit_before, limit_after = asyncio.run(run())
+    assert limit_after < limit_before
+
+def test_limit_halves_when_capacity_error_rate_is_high():
+    async def run():
+        calls = []
+        error = PageSpeedCapacityError("PageSpeed API error: Service Unavailable")
+        scheduler = PageSpeedScheduler(fetch=make_fetch(calls, error=error), initial_limit=8)
+        results = await asyncio.gather(
+            *(scheduler.submit(f"site{i}.com", "mobile", "acme") for i in range(3)),
+            return_exceptions=True
+        )
+        return scheduler, results
+
+    scheduler, results = asyncio.run(run())
+    assert all(isinstance(r, PageSpeedCapacityError) for r in results)
+    # Runs finishing together only back off once
+    assert scheduler.limit == 4
+
+def test_client_errors_leave_the_limit_alone():
+    async def run():
+        calls = []
+        error = ValueError("Error getting PageSpeed metrics: PageSpeed API error: Bad Request")
+        scheduler = PageSpeedScheduler(fetch=make_fetch(calls, error=error), initial_limit=8)
+        results = await asyncio.gather(
+            *(scheduler.submit(f"typo{i}.con", "mobile", "acme") for i in range(5)),
+            return_exceptions=True
+        )
+        return scheduler, results
+
+    scheduler, results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert scheduler.limit == 8
+    assert scheduler.stats()["errorRate"] == 0
+
+def test_queues_are_served_round_robin():
+    async def run():
+        calls = []
+        scheduler = PageSpeedScheduler(fetch=make_fetch(calls), initial_limit=1, max_limit=1)
+        await asyncio.gather(
+            *(scheduler.submit(f"big{i}.com", "mobile", "big-report") for i in range(4)),
+            scheduler.submit("small.com", "mobile", "small-report")
+        )
+        return calls
+
+    calls = asyncio.run(run())
+    order = [url for url, _ in calls]
+    assert order == [
+        "https://big0.com",
+        "https://big1.com",
+        "https://small.com",
+        "https://big2.com",
+        "https://big3.com"
+    ]
+
+def test_identical_runs_are_coalesced():
+    async def run():
+        calls = []
+        gate = asyncio.Event()
+        scheduler = PageSpeedScheduler(fetch=make_fetch(calls, gate=gate))
+        first = asyncio.create_task(scheduler.submit("example.com", "mobile", "a"))
+        second = asyncio.create_task(scheduler.submit("https://example.com/", "MOBILE", "b"))
+        other = asyncio.create_task(scheduler.submit("example.com", "desktop", "a"))
+        await asyncio.sleep(0)
+        gate.set()
+        return calls, await asyncio.gather(first, second, other)
+
+    calls, (first, second, other) = asyncio.run(run())
+    assert calls == [("https://example.com", "mobile"), ("https://example.com", "desktop")]
+    assert first == second
+    assert other["strategy"] == "desktop"
+
+def test_run_continues_after_a_waiter_cancels():
+    async def run():
+        calls = []
+        gate = asyncio.Event()
+        scheduler = PageSpeedScheduler(fetch=make_fetch(calls, gate=gate))
+        cancelled = asyncio.create_task(scheduler.submit("example.com", "mobile", "a"))
+        waiting = asyncio.create_task(scheduler.submit("example.com", "mobile", "b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        result = await waiting
+        return calls, cancelled, result, scheduler
+
+    calls, cancelled, result, scheduler = asyncio.run(run())
+    assert cancelled.cancelled()
+    assert calls == [("https://example.com", "mobile")]
+    assert result == {"url": "https://example.com", "strategy": "mobile"}
+    assert scheduler.stats()["active"] == 0
+
+def test_profiled_waiters_get_queue_time_and_the_shared_run_timings():
+    async def fetch(url, strategy):
+        with track_upstream("pagespeed"):
+            await asyncio.sleep(0.05)
+        return {}
+
+    async def wait_profiled(scheduler, url, fair_key):
+        profile = Timings()
+        current_profile.set(profile)
+        await scheduler.submit(url, "mobile", fair_key)
+        return profile
+
+    async def run():
+        scheduler = PageSpeedScheduler(fetch=fetch, initial_limit=1, max_limit=1)
+        return await asyncio.gather(
+            wait_profiled(scheduler, "first.com", "a"),
+            wait_profiled(scheduler, "second.com", "b"),
+            wait_profiled(scheduler, "second.com", "c")
+        )
+
+    first, second, joined = asyncio.run(run())
+    assert first.spans["pagespeed.queue"] < 0.02
+    assert second.spans["pagespeed.queue"] >= 0.04
+    for profile in (first, second, joined):
+        assert profile.upstream["pagespeed"] >= 0.04
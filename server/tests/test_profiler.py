@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.admin import router as admin_router
+from utils.profiler import Profiler, ProfilerMiddleware, current_profile
+
+def http_scope(headers):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/traffic",
+        "headers": [(name.encode(), value.encode()) for name, value in headers.items()]
+    }
+
+@pytest.fixture
+def enabled_profiler(monkeypatch):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "0")
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    profiler = Profiler()
+    profiler.configure()
+    return profiler
+
+def test_profile_header_alone_is_ignored(enabled_profiler):
+    assert not enabled_profiler.should_profile(http_scope({"x-profile": "1"}))
+
+def test_profile_header_with_wrong_token_is_ignored(enabled_profiler):
+    scope = http_scope({"x-profile": "1", "x-admin-token": "guess"})
+    assert not enabled_profiler.should_profile(scope)
+
+def test_profile_header_with_admin_token_profiles(enabled_profiler):
+    scope = http_scope({"x-profile": "1", "x-admin-token": "s3cret"})
+    assert enabled_profiler.should_profile(scope)
+
+def test_profile_header_is_ignored_without_configured_admin_token(enabled_profiler, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN")
+    scope = http_scope({"x-profile": "1", "x-admin-token": ""})
+    assert not enabled_profiler.should_profile(scope)
+
+def test_first_sample_of_a_short_request_carries_cpu_time(enabled_profiler):
+    async def app(scope, receive, send):
+        # Stay busy only until the sampler has taken its first sample of this request
+        profile = current_profile.get()
+        deadline = time.perf_counter() + 1
+        while not profile.samples and time.perf_counter() < deadline:
+            pass
+
+    middleware = ProfilerMiddleware(app, profiler=enabled_profiler)
+    scope = http_scope({"x-profile": "1", "x-admin-token": "s3cret"})
+    asyncio.run(middleware(scope, None, None))
+
+    summary = enabled_profiler.profiles[-1].summary()
+    assert summary["samples"] > 0
+    assert summary["cpuMs"] >= enabled_profiler.interval * 1000 * 0.95
+
+@pytest.fixture
+def admin_client():
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/api")
+    return TestClient(app)
+
+@pytest.mark.parametrize("path", ["/api/admin/profiles", "/api/admin/profiles/flamegraph"])
+def test_admin_requires_a_configured_token(admin_client, monkeypatch, path):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert admin_client.get(path).status_code == 403
+
+@pytest.mark.parametrize("path", ["/api/admin/profiles", "/api/admin/profiles/flamegraph"])
+def test_admin_rejects_missing_or_wrong_token(admin_client, monkeypatch, path):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert admin_client.get(path).status_code == 401
+    assert admin_client.get(path, headers={"X-Admin-Token": "guess"}).status_code == 401
+    assert admin_client.get(path, headers={"X-Admin-Token": "s3cret"}).status_code == 200
@@ -0,0 +1,92 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from models.schemas import CompetitorAnalysis
+from utils import compression, serialization
+from utils.compression import CompressionMiddleware
+from utils.serialization import negotiate_response
+
+VALID = {
+    "companyDescription": "Acme sells everything.",
+    "competitors": [{
+        "name": "Globex",
+        "description": "A competitor",
+        "strengths": ["Price"],
+        "weaknesses": ["Support"],
+        "threats": ["Scale"],
+        "website": "https://globex.com"
+    }]
+}
+
+# LLM output with a missing field and a numeric revenue
+INVALID = {
+    "companyDescription": "Acme sells everything.",
+    "competitors": [{
+        "name": "Globex",
+        "description": "A competitor",
+        "strengths": ["Price"],
+        "weaknesses": ["Support"],
+        "revenue": 1000000
+    }]
+}
+
+def make_client(payload):
+    app = FastAPI()
+
+    @app.get("/insights")
+    async def insights(request: Request):
+        return negotiate_response(request, payload, CompetitorAnalysis)
+
+    return TestClient(app)
+
+def test_json_is_the_default():
+    response = make_client(VALID).get("/insights")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["vary"] == "Accept"
+    # Fields the payload left out stay absent
+    assert response.json() == VALID
+
+def test_msgpack_when_requested():
+    msgpack = pytest.importorskip("msgpack")
+    response = make_client(VALID).get("/insights", headers={"Accept": "application/x-msgpack"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-msgpack"
+    assert response.headers["vary"] == "Accept"
+    assert msgpack.unpackb(response.content) == VALID
+
+def test_json_without_msgpack_installed(monkeypatch):
+    monkeypatch.setattr(serialization, "msgpack", None)
+    response = make_client(VALID).get("/insights", headers={"Accept": "application/x-msgpack"})
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == VALID
+
+def test_payload_not_matching_the_model_is_sent_as_is():
+    response = make_client(INVALID).get("/insights")
+    assert response.status_code == 200
+    assert response.json() == INVALID
+
+def test_msgpack_payload_not_matching_the_model_is_sent_as_is():
+    msgpack = pytest.importorskip("msgpack")
+    response = make_client(INVALID).get("/insights", headers={"Accept": "application/x-msgpack"})
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content) == INVALID
+
+def test_compression_threshold_is_read_on_first_request(monkeypatch):
+    # Force the gzip fallback so the test does not depend on brotli-asgi
+    monkeypatch.setattr(compression, "BrotliMiddleware", None)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/small")
+    async def small():
+        return {"data": "x" * 200}
+
+    # Entering the client runs lifespan startup, which builds the middleware stack; the
+    # setting is changed afterwards, like a value main.py loads from .env in lifespan
+    with TestClient(app) as client:
+        monkeypatch.setenv("COMPRESSION_MIN_SIZE", "100")
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == {"data": "x" * 200}
@@ -0,0 +1,14 @@
+import os
+import secrets
+from typing import Optional
+
+def admin_configured() -> bool:
+    """Check whether an ADMIN_TOKEN is set"""
+    return bool(os.getenv("ADMIN_TOKEN"))
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Compare a token against ADMIN_TOKEN in constant time"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or token is None:
+        return False
+    return secrets.compare_digest(token.encode(), admin_token.encode())
@@ -0,0 +1,48 @@
+import os
+from typing import Iterable, Optional
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # brotli-asgi is optional, fall back to gzip only
+    BrotliMiddleware = None
+
+class CompressionMiddleware:
+    """Compress responses above a size threshold with brotli, or gzip for older clients
+
+    Paths under `excluded_prefixes` (e.g. already-compressed screenshots) are
+    passed through untouched. Without an explicit `minimum_size`, the threshold
+    is read from COMPRESSION_MIN_SIZE on the first request, after `.env` is loaded.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        excluded_prefixes: Iterable[str] = ()
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self.compressed_app: Optional[ASGIApp] = None
+
+    def _build_compressed_app(self) -> ASGIApp:
+        if self.minimum_size is None:
+            self.minimum_size = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        if BrotliMiddleware is not None:
+            return BrotliMiddleware(
+                self.app,
+                quality=4,
+                minimum_size=self.minimum_size,
+                gzip_fallback=True
+            )
+        return GZipMiddleware(self.app, minimum_size=self.minimum_size, compresslevel=6)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not scope["path"].startswith(self.excluded_prefixes):
+            if self.compressed_app is None:
+                self.compressed_app = self._build_compressed_app()
+            await self.compressed_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -0,0 +1,237 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.auth import is_admin_token
+
+PROFILE_HEADER = "x-profile"
+ADMIN_TOKEN_HEADER = "x-admin-token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+class Timings:
+    """Time spent awaiting each upstream and in named sections"""
+
+    def __init__(self):
+        self.upstream: Dict[str, float] = defaultdict(float)
+        self.spans: Dict[str, float] = defaultdict(float)
+
+    def merge(self, other: "Timings") -> None:
+        """Credit timings recorded elsewhere (e.g. a shared background run) to these"""
+        for name, seconds in other.upstream.items():
+            self.upstream[name] += seconds
+        for name, seconds in other.spans.items():
+            self.spans[name] += seconds
+
+# Timings of the request (or shared background run) being handled, None when not profiled
+current_profile: ContextVar[Optional[Timings]] = ContextVar("current_profile", default=None)
+
+class RequestProfile(Timings):
+    """Samples and timings collected for one profiled request"""
+
+    def __init__(self, method: str, path: str):
+        super().__init__()
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now()
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.samples: Counter = Counter()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_sample(self, stack: str, elapsed: float) -> None:
+        with self._lock:
+            self.samples[stack] += 1
+            self.cpu += elapsed
+
+    def finish(self) -> None:
+        self.wall = time.perf_counter() - self._start
+
+    def summary(self) -> dict:
+        """Wall time split into upstream awaits, CPU on the event loop and everything else"""
+        with self._lock:
+            sample_count = sum(self.samples.values())
+            cpu = self.cpu
+        upstream_total = sum(self.upstream.values())
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "startedAt": self.started_at.isoformat(),
+            "wallMs": round(self.wall * 1000, 1),
+            "cpuMs": round(cpu * 1000, 1),
+            "upstreamMs": {name: round(t * 1000, 1) for name, t in self.upstream.items()},
+            "spansMs": {name: round(t * 1000, 1) for name, t in self.spans.items()},
+            # Concurrent upstream awaits can overlap, so this is clamped at zero
+            "otherMs": round(max(0.0, self.wall - cpu - upstream_total) * 1000, 1),
+            "samples": sample_count
+        }
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format, as read by flamegraph.pl and speedscope"""
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.samples.items())
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    filename = "/".join(code.co_filename.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+class Profiler:
+    """Opt-in sampling profiler for individual requests
+
+    A background thread samples the event loop thread's stack every `interval`
+    seconds while profiled requests are running. A sample is attributed to a
+    request when that request's middleware frame is on the stack, so samples
+    measure CPU time on the loop and time spent suspended on awaits does not
+    show up in them. Awaits on upstream APIs are timed separately with
+    `track_upstream`. Work in background tasks detached from the request
+    (shared PageSpeed runs) is not sampled, only timed and credited back.
+    """
+
+    def __init__(self, interval: float = 0.005, max_profiles: int = 50):
+        self.interval = interval
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.profiles: Deque[RequestProfile] = deque(maxlen=max_profiles)
+        self._frames: Dict[int, RequestProfile] = {}
+        self._loop_thread_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self) -> None:
+        """Read profiling settings from the environment"""
+        self.enabled = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        if self.enabled:
+            print(f"[{datetime.now()}] 🔬 Profiling enabled (sample rate {self.sample_rate:.0%})")
+
+    def should_profile(self, scope: Scope) -> bool:
+        if not self.enabled:
+            return False
+        headers = dict(scope.get("headers", []))
+        # Profiling on demand is an admin feature, anonymous clients only get random sampling
+        if headers.get(PROFILE_HEADER.encode()) in (b"1", b"true"):
+            token = headers.get(ADMIN_TOKEN_HEADER.encode())
+            if token is not None and is_admin_token(token.decode("latin-1")):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, method: str, path: str, frame) -> RequestProfile:
+        profile = RequestProfile(method, path)
+        with self._lock:
+            self._loop_thread_id = threading.get_ident()
+            self._frames[id(frame)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+        return profile
+
+    def stop(self, profile: RequestProfile, frame) -> None:
+        profile.finish()
+        with self._lock:
+            self._frames.pop(id(frame), None)
+        self.profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return next((p for p in self.profiles if p.id == profile_id), None)
+
+    def _sample_loop(self) -> None:
+        last_sample = time.perf_counter()
+        while True:
+            if not self._wake.is_set():
+                self._wake.wait()
+                # The first sample after waking stands for one interval, not the idle time before it
+                last_sample = time.perf_counter() - self.interval
+            with self._lock:
+                if not self._frames:
+                    self._wake.clear()
+                    continue
+                frames = dict(self._frames)
+                thread_id = self._loop_thread_id
+
+            # Weight each sample by the real time since the previous one, sleep() overshoots
+            now = time.perf_counter()
+            elapsed = now - last_sample
+            last_sample = now
+
+            frame = sys._current_frames().get(thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                profile = frames.get(id(frame))
+                if profile is not None:
+                    stack.append(f"{profile.method} {profile.path}")
+                    profile.add_sample(";".join(reversed(stack)), elapsed)
+                    break
+                stack.append(format_frame(frame))
+                frame = frame.f_back
+
+            time.sleep(self.interval)
+
+profiler = Profiler()
+
+@contextmanager
+def track_upstream(name: str) -> Iterator[None]:
+    """Time an await on an upstream API for the current profiled request"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.upstream[name] += time.perf_counter() - start
+
+@contextmanager
+def track_span(name: str) -> Iterator[None]:
+    """Time a named section (parsing, validation, ...) for the current profiled request"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans[name] += time.perf_counter() - start
+
+class ProfilerMiddleware:
+    """Profile requests opted in by the X-Profile header (with X-Admin-Token) or the sample rate"""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler = profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # The sampler finds this request by looking for this frame on the loop's stack
+        frame = sys._getframe()
+        profile = self.profiler.start(scope["method"], scope["path"], frame)
+        token = current_profile.set(profile)
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            current_profile.reset(token)
+            self.profiler.stop(profile, frame)
@@ -0,0 +1,54 @@
+from typing import Any, Type
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
+from datetime import datetime
+from utils.profiler import track_span
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, MessagePack responses are disabled without it
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/x-msgpack", "application/msgpack")
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+def wants_msgpack(request: Request) -> bool:
+    """Check whether the client asked for a MessagePack response"""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+def negotiate_response(request: Request, payload: Any, model: Type[BaseModel]) -> Response:
+    """Serialize a payload as MessagePack or JSON, based on Accept
+
+    Payloads matching `model` are serialized by Pydantic, which writes the bytes
+    directly. LLM output does not always match the model, so a payload that
+    fails validation is sent as-is rather than failing the request.
+    """
+    headers = {"Vary": "Accept"}
+    try:
+        with track_span("pydantic.validate"):
+            validated = model.model_validate(payload)
+    except ValidationError as e:
+        print(f"[{datetime.now()}] ⚠️  Payload does not match {model.__name__}, sending it unvalidated: {e.error_count()} errors")
+        validated = None
+
+    if wants_msgpack(request):
+        # exclude_unset keeps fields the payload left out absent instead of sending null
+        data = validated.model_dump(mode="json", exclude_unset=True) if validated else payload
+        return MsgPackResponse(data, headers=headers)
+    if validated is None:
+        return JSONResponse(payload, headers=headers)
+    return Response(
+        validated.model_dump_json(exclude_unset=True),
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers
+    )
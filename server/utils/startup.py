@@ -0,0 +1,18 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator
+
+# Duration in milliseconds of each startup phase, in the order they ran
+startup_timings: Dict[str, float] = {}
+
+@contextmanager
+def track_phase(name: str) -> Iterator[None]:
+    """Record how long a startup phase (imports, warm-up, ...) takes"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        startup_timings[name] = round(elapsed, 2)
+        print(f"[{datetime.now()}] ⏱️  Startup phase '{name}' took {elapsed:.1f}ms")